@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import os
+import re
 import shutil
 import signal
 import subprocess
@@ -9,8 +12,7 @@ import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Dict, List, Optional, TextIO
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from ..artifacts import expected_paths
 from ..contracts import (
@@ -27,24 +29,47 @@ from ..errors import classify_error, detect_warnings
 from ..types import ErrorKind
 
 
-def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+_HEARTBEAT_ISO_GRANULARITY_SECONDS = 0.25
+_LAST_ISO: Tuple[float, str] = (0.0, "")
+
+
+def now_iso(granularity: float = 0.0) -> str:
+    """Return the current UTC time; with ``granularity`` > 0 a timestamp at most that many seconds old may be reused."""
+    global _LAST_ISO
+    if granularity <= 0:
+        return datetime.now(timezone.utc).isoformat()
+    now = time.monotonic()
+    last_at, last_iso = _LAST_ISO
+    if last_iso and now - last_at < granularity:
+        return last_iso
+    iso = datetime.now(timezone.utc).isoformat()
+    _LAST_ISO = (now, iso)
+    return iso
 
 
 @dataclass
 class ShimRunHandle:
-    process: subprocess.Popen[str]
-    stdout_path: Path
-    stderr_path: Path
-    provider_result_path: Path
-    stdout_file: TextIO
-    stderr_file: TextIO
+    process: subprocess.Popen[bytes]
+    # Plain strings: they are formatted into every status and passed straight to open()/os.open().
+    stdout_path: str
+    stderr_path: str
+    provider_result_path: str
+    merged_output: bool = False
 
 
 _ENV_VARS_TO_STRIP = (
     "CLAUDECODE",
 )
 
+# A resolved binary's --version output is stable for the life of the process, so it is probed once.
+# Auth status is deliberately not cached: users may log in or out between runs.
+_VERSION_CACHE: Dict[str, str] = {}
+
+_CONFIG_MARKER_RE = re.compile(r"configuration|config|unknown key|invalid|toml|yaml", re.IGNORECASE)
+_AUTH_MARKER_RE = re.compile(r"not logged|auth|unauthorized|token|api key|login", re.IGNORECASE)
+
+_LOG_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
 
 def _sanitize_env() -> Dict[str, str]:
     """Return a copy of os.environ with known conflicting variables removed."""
@@ -54,14 +79,38 @@ def _sanitize_env() -> Dict[str, str]:
     return env
 
 
+def _read_log(path: str) -> str:
+    """Return the full text of a provider log, or "" if it was never created.
+
+    Success checks, error classification and warning detection match markers anywhere in the log,
+    so the whole file is read rather than a bounded window.
+    """
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return ""
+
+
 class ShimAdapterBase:
     id: ProviderId
+    # When true, stderr is redirected into the stdout log and classification reads that combined stream.
+    merge_stderr: bool = False
 
     def __init__(self, provider_id: ProviderId, binary_name: str, capability_set: CapabilitySet) -> None:
         self.id = provider_id
         self.binary_name = binary_name
         self._capability_set = capability_set
         self._runs: Dict[str, ShimRunHandle] = {}
+        self._binary_cache: Optional[str] = None
+        self._stdout_key = f"raw/{provider_id}.stdout.log"
+        self._stderr_key = f"raw/{provider_id}.stderr.log"
+        self._result_key = f"providers/{provider_id}.json"
+
+    @functools.cached_property
+    def _sanitized_env(self) -> Dict[str, str]:
+        # Snapshot once per adapter instance; callers must treat it as read-only.
+        return _sanitize_env()
 
     def detect(self) -> ProviderPresence:
         binary = self._resolve_binary()
@@ -86,6 +135,31 @@ class ShimAdapterBase:
             reason=reason,
         )
 
+    async def detect_async(self) -> ProviderPresence:
+        binary = self._resolve_binary()
+        if not binary:
+            return ProviderPresence(
+                provider=self.id,
+                detected=False,
+                binary_path=None,
+                version=None,
+                auth_ok=False,
+                reason="binary_not_found",
+            )
+
+        version, (auth_ok, reason) = await asyncio.gather(
+            self._probe_version_async(binary),
+            self._probe_auth_async(binary),
+        )
+        return ProviderPresence(
+            provider=self.id,
+            detected=True,
+            binary_path=binary,
+            version=version,
+            auth_ok=auth_ok,
+            reason=reason,
+        )
+
     def capabilities(self) -> CapabilitySet:
         return self._capability_set
 
@@ -104,29 +178,35 @@ class ShimAdapterBase:
         paths["providers_dir"].mkdir(parents=True, exist_ok=True)
         paths["raw_dir"].mkdir(parents=True, exist_ok=True)
 
-        stdout_path = paths[f"raw/{self.id}.stdout.log"]
-        stderr_path = paths[f"raw/{self.id}.stderr.log"]
-        provider_result_path = paths[f"providers/{self.id}.json"]
+        stdout_path = paths[self._stdout_key]
+        stderr_path = paths[self._stderr_key]
+        provider_result_path = paths[self._result_key]
         run_id = f"{self.id}-{uuid.uuid4().hex[:12]}"
 
-        stdout_file = stdout_path.open("w", encoding="utf-8")
-        stderr_file = stderr_path.open("w", encoding="utf-8")
-        process = subprocess.Popen(
-            cmd,
-            cwd=input_task.repo_root,
-            stdout=stdout_file,
-            stderr=stderr_file,
-            text=True,
-            start_new_session=True,
-            env=_sanitize_env(),
-        )
+        # The child writes straight to these descriptors; the parent drops its copies once spawned.
+        stdout_fd = os.open(stdout_path, _LOG_OPEN_FLAGS, 0o644)
+        try:
+            if self.merge_stderr:
+                # Drop a stale log from an earlier run so readers never pick up old stderr.
+                try:
+                    os.unlink(stderr_path)
+                except FileNotFoundError:
+                    pass
+                process = self._spawn(cmd, input_task.repo_root, stdout_fd, subprocess.STDOUT)
+            else:
+                stderr_fd = os.open(stderr_path, _LOG_OPEN_FLAGS, 0o644)
+                try:
+                    process = self._spawn(cmd, input_task.repo_root, stdout_fd, stderr_fd)
+                finally:
+                    os.close(stderr_fd)
+        finally:
+            os.close(stdout_fd)
         self._runs[run_id] = ShimRunHandle(
             process=process,
-            stdout_path=stdout_path,
-            stderr_path=stderr_path,
-            provider_result_path=provider_result_path,
-            stdout_file=stdout_file,
-            stderr_file=stderr_file,
+            stdout_path=str(stdout_path),
+            stderr_path=str(stdout_path if self.merge_stderr else stderr_path),
+            provider_result_path=str(provider_result_path),
+            merged_output=self.merge_stderr,
         )
         return TaskRunRef(
             task_id=input_task.task_id,
@@ -138,16 +218,15 @@ class ShimAdapterBase:
             session_id=None,
         )
 
-    @staticmethod
-    def _close_io(handle: ShimRunHandle) -> None:
-        try:
-            handle.stdout_file.close()
-        except Exception:
-            pass
-        try:
-            handle.stderr_file.close()
-        except Exception:
-            pass
+    def _spawn(self, cmd: List[str], cwd: str, stdout_fd: int, stderr_target: int) -> subprocess.Popen[bytes]:
+        return subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdout=stdout_fd,
+            stderr=stderr_target,
+            start_new_session=True,
+            env=self._sanitized_env,
+        )
 
     def poll(self, ref: TaskRunRef) -> TaskStatus:
         handle = self._runs.get(ref.run_id)
@@ -165,6 +244,9 @@ class ShimAdapterBase:
                 message="run_handle_not_found",
             )
 
+        # Each run is reaped by its own non-blocking Popen.poll(). A batched os.waitid(P_ALL, ...) would
+        # also observe children this adapter does not own and race with Popen's own reaping, and WNOWAIT
+        # never clears the exit status, so there is no cheaper way to check many runs at once.
         return_code = handle.process.poll()
         if return_code is None:
             return TaskStatus(
@@ -173,17 +255,15 @@ class ShimAdapterBase:
                 run_id=ref.run_id,
                 attempt_state="STARTED",
                 completed=False,
-                heartbeat_at=now_iso(),
-                output_path=str(handle.provider_result_path),
+                heartbeat_at=now_iso(_HEARTBEAT_ISO_GRANULARITY_SECONDS),
+                output_path=handle.provider_result_path,
                 error_kind=None,
                 exit_code=None,
                 message="running",
             )
 
-        self._close_io(handle)
-
-        stdout_text = handle.stdout_path.read_text(encoding="utf-8") if handle.stdout_path.exists() else ""
-        stderr_text = handle.stderr_path.read_text(encoding="utf-8") if handle.stderr_path.exists() else ""
+        stdout_text = _read_log(handle.stdout_path)
+        stderr_text = stdout_text if handle.merged_output else _read_log(handle.stderr_path)
         success = self._is_success(return_code, stdout_text, stderr_text)
         error_kind = None if success else classify_error(return_code, stderr_text)
         warnings = [warning.value for warning in detect_warnings(stderr_text)]
@@ -200,10 +280,11 @@ class ShimAdapterBase:
             "success": success,
             "error_kind": error_kind.value if error_kind else None,
             "warnings": warnings,
-            "stdout_path": str(handle.stdout_path),
-            "stderr_path": str(handle.stderr_path),
+            "stdout_path": handle.stdout_path,
+            "stderr_path": handle.stderr_path,
         }
-        handle.provider_result_path.write_text(json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8")
+        with open(handle.provider_result_path, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(payload, ensure_ascii=True, indent=2))
         self._runs.pop(ref.run_id, None)
 
         return TaskStatus(
@@ -213,56 +294,79 @@ class ShimAdapterBase:
             attempt_state="SUCCEEDED" if success else "FAILED",
             completed=True,
             heartbeat_at=now_iso(),
-            output_path=str(handle.provider_result_path),
+            output_path=handle.provider_result_path,
             error_kind=error_kind,
             exit_code=return_code,
             message="completed",
         )
 
+    def wait(self, ref: TaskRunRef, timeout: Optional[float] = None) -> bool:
+        """Block until the run's process exits or ``timeout`` elapses; return whether it has exited.
+
+        Unknown or already released runs count as exited so callers can go straight to ``poll``.
+        """
+        handle = self._runs.get(ref.run_id)
+        if handle is None:
+            return True
+        try:
+            handle.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+
     def cancel(self, ref: TaskRunRef) -> None:
         handle = self._runs.get(ref.run_id)
         if handle is None:
             return
         if handle.process.poll() is not None:
-            self._close_io(handle)
             self._runs.pop(ref.run_id, None)
             return
         try:
             os.killpg(os.getpgid(handle.process.pid), signal.SIGTERM)
         except ProcessLookupError:
-            self._close_io(handle)
             self._runs.pop(ref.run_id, None)
             return
-        time.sleep(0.2)
-        if handle.process.poll() is None:
+        try:
+            handle.process.wait(timeout=0.2)
+        except subprocess.TimeoutExpired:
             try:
                 os.killpg(os.getpgid(handle.process.pid), signal.SIGKILL)
             except ProcessLookupError:
-                self._close_io(handle)
                 self._runs.pop(ref.run_id, None)
                 return
-            time.sleep(0.1)
-        if handle.process.poll() is not None:
-            self._close_io(handle)
-            self._runs.pop(ref.run_id, None)
+            try:
+                handle.process.wait(timeout=0.1)
+            except subprocess.TimeoutExpired:
+                return
+        self._runs.pop(ref.run_id, None)
 
     def normalize(self, raw: object, ctx: NormalizeContext) -> List[NormalizedFinding]:
         raise NotImplementedError
 
     def _resolve_binary(self) -> Optional[str]:
-        env = _sanitize_env()
-        return shutil.which(self.binary_name, path=env.get("PATH"))
+        if self._binary_cache is None:
+            self._binary_cache = shutil.which(self.binary_name, path=self._sanitized_env.get("PATH"))
+        return self._binary_cache
 
     def _probe_version(self, binary: str) -> Optional[str]:
+        cached = _VERSION_CACHE.get(binary)
+        if cached is not None:
+            return cached
         result = subprocess.run(
             [binary, "--version"],
             capture_output=True,
             text=True,
             check=False,
-            env=_sanitize_env(),
+            env=self._sanitized_env,
         )
-        lines = (result.stdout or result.stderr).splitlines()
-        return lines[-1].strip() if lines else None
+        return _remember_version(binary, _version_from_output(result.stdout, result.stderr))
+
+    async def _probe_version_async(self, binary: str) -> Optional[str]:
+        cached = _VERSION_CACHE.get(binary)
+        if cached is not None:
+            return cached
+        _, stdout, stderr = await _run_probe_async([binary, "--version"], self._sanitized_env)
+        return _remember_version(binary, _version_from_output(stdout, stderr))
 
     def _probe_auth(self, binary: str) -> tuple[bool, str]:
         cmd = self._auth_check_command(binary)
@@ -271,19 +375,13 @@ class ShimAdapterBase:
             capture_output=True,
             text=True,
             check=False,
-            env=_sanitize_env(),
+            env=self._sanitized_env,
         )
-        if result.returncode == 0:
-            return True, "ok"
-
-        output = f"{result.stdout or ''}\n{result.stderr or ''}".lower()
-        config_markers = ("configuration", "config", "unknown key", "invalid", "toml", "yaml")
-        if any(marker in output for marker in config_markers):
-            return False, "probe_config_error"
-        auth_markers = ("not logged", "auth", "unauthorized", "token", "api key", "login")
-        if any(marker in output for marker in auth_markers):
-            return False, "auth_check_failed"
-        return False, "probe_unknown_error"
+        return _auth_result_from_output(result.returncode, result.stdout, result.stderr)
+
+    async def _probe_auth_async(self, binary: str) -> tuple[bool, str]:
+        returncode, stdout, stderr = await _run_probe_async(self._auth_check_command(binary), self._sanitized_env)
+        return _auth_result_from_output(returncode, stdout, stderr)
 
     def _auth_check_command(self, binary: str) -> List[str]:
         raise NotImplementedError
@@ -298,3 +396,59 @@ class ShimAdapterBase:
         _ = stdout_text
         _ = stderr_text
         return return_code == 0
+
+
+def _remember_version(binary: str, version: Optional[str]) -> Optional[str]:
+    if version is not None:
+        _VERSION_CACHE[binary] = version
+    return version
+
+
+def _version_from_output(stdout: Optional[str], stderr: Optional[str]) -> Optional[str]:
+    lines = (stdout or stderr or "").splitlines()
+    return lines[-1].strip() if lines else None
+
+
+def _auth_result_from_output(returncode: int, stdout: Optional[str], stderr: Optional[str]) -> tuple[bool, str]:
+    if returncode == 0:
+        return True, "ok"
+
+    output = f"{stdout or ''}\n{stderr or ''}"
+    if _CONFIG_MARKER_RE.search(output):
+        return False, "probe_config_error"
+    if _AUTH_MARKER_RE.search(output):
+        return False, "auth_check_failed"
+    return False, "probe_unknown_error"
+
+
+async def _run_probe_async(cmd: List[str], env: Dict[str, str]) -> tuple[int, str, str]:
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env,
+    )
+    stdout, stderr = await process.communicate()
+    return (
+        process.returncode if process.returncode is not None else -1,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+async def detect_all(
+    adapters: Iterable[object],
+    return_exceptions: bool = False,
+) -> List[Union[ProviderPresence, BaseException]]:
+    """Probe every adapter concurrently so detection costs max-of-latencies, not the sum.
+
+    Adapters without ``detect_async`` fall back to their blocking ``detect`` on a worker thread.
+    """
+    probes = []
+    for adapter in adapters:
+        detect_async = getattr(adapter, "detect_async", None)
+        if callable(detect_async):
+            probes.append(detect_async())
+        else:
+            probes.append(asyncio.to_thread(adapter.detect))  # type: ignore[attr-defined]
+    return await asyncio.gather(*probes, return_exceptions=return_exceptions)
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Mapping
+from typing import Dict, List, Mapping, TextIO
 
 from .adapters import ClaudeAdapter, CodexAdapter, GeminiAdapter, OpenCodeAdapter, QwenAdapter
+from .adapters.shim import detect_all
 from .config import ReviewConfig, ReviewPolicy
 from .contracts import ProviderPresence
-from .formatters import format_markdown_pr, format_sarif
+from .formatters import format_markdown_pr, format_sarif_json
 from .review_engine import ReviewRequest, run_review
 
 SUPPORTED_PROVIDERS = ("claude", "codex", "gemini", "opencode", "qwen")
@@ -86,21 +88,18 @@ def _doctor_adapter_registry() -> Mapping[str, object]:
 
 def _doctor_provider_presence(providers: List[str]) -> Dict[str, ProviderPresence]:
     adapters = _doctor_adapter_registry()
+    selected = [(provider, adapters[provider]) for provider in providers if provider in adapters]
+    probes = asyncio.run(detect_all([adapter for _, adapter in selected], return_exceptions=True))
     presence: Dict[str, ProviderPresence] = {}
-    for provider in providers:
-        adapter = adapters.get(provider)
-        if adapter is None:
-            continue
-        try:
-            probe = adapter.detect()
-        except Exception as exc:
+    for (provider, _), probe in zip(selected, probes):
+        if isinstance(probe, BaseException):
             presence[provider] = ProviderPresence(
                 provider=provider,  # type: ignore[arg-type]
                 detected=False,
                 binary_path=None,
                 version=None,
                 auth_ok=False,
-                reason=f"probe_error:{exc.__class__.__name__}",
+                reason=f"probe_error:{probe.__class__.__name__}",
             )
             continue
         presence[provider] = probe
@@ -499,19 +498,27 @@ def _resolve_config(args: argparse.Namespace) -> ReviewConfig:
     return ReviewConfig(providers=providers, artifact_base=artifact_base, policy=policy)
 
 
-def main(argv: List[str] | None = None) -> int:
+def main(
+    argv: List[str] | None = None,
+    *,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None,
+) -> int:
+    # Streams resolve at call time so callers that swap sys.stdout/sys.stderr keep working.
+    out = sys.stdout if stdout is None else stdout
+    err = sys.stderr if stderr is None else stderr
     parser = build_parser()
     args = parser.parse_args(argv)
     if args.command == "doctor":
         providers = [item for item in _parse_providers(args.providers) if item in SUPPORTED_PROVIDERS]
         if not providers:
-            print("No valid providers selected.", file=sys.stderr)
+            print("No valid providers selected.", file=err)
             return 2
         payload = _doctor_payload(providers, _doctor_provider_presence(providers))
         if args.json:
-            print(json.dumps(payload, ensure_ascii=True))
+            print(json.dumps(payload, ensure_ascii=True), file=out)
         else:
-            print(_render_doctor_report(payload))
+            print(_render_doctor_report(payload), file=out)
         return 0
 
     if args.command not in ("run", "review"):
@@ -521,17 +528,17 @@ def main(argv: List[str] | None = None) -> int:
     try:
         cfg = _resolve_config(args)
     except ValueError as exc:
-        print(f"Configuration error: {exc}", file=sys.stderr)
+        print(f"Configuration error: {exc}", file=err)
         return 2
     repo_root = str(Path(args.repo).resolve())
     providers = [item for item in cfg.providers if item in SUPPORTED_PROVIDERS]
     if not providers:
-        print("No valid providers selected.", file=sys.stderr)
+        print("No valid providers selected.", file=err)
         return 2
     synth_provider = args.synth_provider.strip() if isinstance(args.synth_provider, str) else ""
     synthesize = bool(args.synthesize or synth_provider)
     if synth_provider and synth_provider not in providers:
-        print("--synth-provider must be one of selected providers", file=sys.stderr)
+        print("--synth-provider must be one of selected providers", file=err)
         return 2
 
     req = ReviewRequest(
@@ -548,7 +555,7 @@ def main(argv: List[str] | None = None) -> int:
     )
     review_mode = args.command == "review"
     if args.format in ("markdown-pr", "sarif") and not review_mode:
-        print(f"--format {args.format} is supported only for review command", file=sys.stderr)
+        print(f"--format {args.format} is supported only for review command", file=err)
         return 2
     effective_result_mode = args.result_mode
     if args.save_artifacts and effective_result_mode == "stdout":
@@ -557,7 +564,7 @@ def main(argv: List[str] | None = None) -> int:
     try:
         result = run_review(req, review_mode=review_mode, write_artifacts=write_artifacts)
     except ValueError as exc:
-        print(f"Input error: {exc}", file=sys.stderr)
+        print(f"Input error: {exc}", file=err)
         return 2
 
     payload = {
@@ -580,12 +587,12 @@ def main(argv: List[str] | None = None) -> int:
         payload["synthesis"] = result.synthesis
     if effective_result_mode == "artifact":
         if args.json:
-            print(json.dumps(payload, ensure_ascii=True))
+            print(json.dumps(payload, ensure_ascii=True), file=out)
         else:
             if args.format == "markdown-pr":
-                print(format_markdown_pr(payload, result.findings))
+                print(format_markdown_pr(payload, result.findings), file=out)
             elif args.format == "sarif":
-                print(json.dumps(format_sarif(payload, result.findings), ensure_ascii=True, indent=2))
+                print(format_sarif_json(payload, result.findings), file=out)
             else:
                 print(
                     _render_user_readable_report(
@@ -594,19 +601,20 @@ def main(argv: List[str] | None = None) -> int:
                         providers,
                         payload,
                         result.provider_results,
-                    )
+                    ),
+                    file=out,
                 )
     else:
         detailed_payload = dict(payload)
         detailed_payload["result_mode"] = effective_result_mode
         detailed_payload["provider_results"] = result.provider_results
         if args.json:
-            print(json.dumps(detailed_payload, ensure_ascii=True))
+            print(json.dumps(detailed_payload, ensure_ascii=True), file=out)
         else:
             if args.format == "markdown-pr":
-                print(format_markdown_pr(payload, result.findings))
+                print(format_markdown_pr(payload, result.findings), file=out)
             elif args.format == "sarif":
-                print(json.dumps(format_sarif(payload, result.findings), ensure_ascii=True, indent=2))
+                print(format_sarif_json(payload, result.findings), file=out)
             else:
                 print(
                     _render_user_readable_report(
@@ -615,7 +623,8 @@ def main(argv: List[str] | None = None) -> int:
                         providers,
                         payload,
                         result.provider_results,
-                    )
+                    ),
+                    file=out,
                 )
 
     if result.decision == "FAIL":
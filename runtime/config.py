@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Mapping
 
-DEFAULT_PROVIDER_TIMEOUTS: Dict[str, int] = {
-}
+# Read-only so no caller can leak edits into later policies; each policy copies it into its own dict.
+DEFAULT_PROVIDER_TIMEOUTS: Mapping[str, int] = MappingProxyType({
+})
 
 
 @dataclass(frozen=True)
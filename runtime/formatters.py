@@ -1,22 +1,43 @@
 from __future__ import annotations
 
+import functools
 import hashlib
+import io
+import json
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 _SEVERITY_ORDER = ("critical", "high", "medium", "low")
+_SEVERITY_INDEX = {severity: index for index, severity in enumerate(_SEVERITY_ORDER)}
+_SEVERITY_FALLBACK = len(_SEVERITY_ORDER)
 _SARIF_LEVEL_BY_SEVERITY = {
     "critical": "error",
     "high": "warning",
     "medium": "note",
     "low": "note",
 }
+_RULE_NAME_SEPARATOR_RE = re.compile(r"[^a-zA-Z0-9]+")
+# Single-pass escaping: replacement text (e.g. the backslash in "\\|") is never escaped again.
+_MARKDOWN_CELL_ESCAPES = str.maketrans({"\\": "\\\\", "|": "\\|", "\n": "<br>"})
+_MARKDOWN_FINDINGS_HEADER = (
+    "| Severity | Category | Title | Location | Confidence | Recommendation |\n"
+    "|---|---|---|---|---:|---|"
+)
+_SARIF_SCHEMA_URI = "https://json.schemastore.org/sarif-2.1.0.json"
+_SARIF_VERSION = "2.1.0"
+_SARIF_DRIVER = {
+    "name": "MCO",
+    "informationUri": "https://github.com/mco-org/mco",
+}
 
 
 def _escape_markdown_cell(value: object) -> str:
-    text = str(value)
-    return text.replace("\\", "\\\\").replace("|", "\\|").replace("\n", "<br>")
+    return str(value).translate(_MARKDOWN_CELL_ESCAPES)
+
+
+def _safe_float(value: object) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
 
 
 def _finding_location(finding: Dict[str, object]) -> str:
@@ -39,93 +60,88 @@ def format_markdown_pr(payload: Dict[str, object], findings: List[Dict[str, obje
         if severity in counts:
             counts[severity] += 1
 
-    lines: List[str] = [
-        "## MCO Review Summary",
-        "",
-        f"- Decision: **{payload.get('decision', '-')}**",
-        f"- Terminal State: `{payload.get('terminal_state', '-')}`",
-        f"- Providers: success `{payload.get('provider_success_count', 0)}` / failure `{payload.get('provider_failure_count', 0)}`",
-        f"- Findings: `{payload.get('findings_count', 0)}`",
-        "",
-        "### Severity Breakdown",
-        "",
-        "| Severity | Count |",
-        "|---|---:|",
-    ]
+    buf = io.StringIO()
+    w = buf.write
+    w(
+        "## MCO Review Summary\n"
+        "\n"
+        f"- Decision: **{payload.get('decision', '-')}**\n"
+        f"- Terminal State: `{payload.get('terminal_state', '-')}`\n"
+        f"- Providers: success `{payload.get('provider_success_count', 0)}` / failure `{payload.get('provider_failure_count', 0)}`\n"
+        f"- Findings: `{payload.get('findings_count', 0)}`\n"
+        "\n"
+        "### Severity Breakdown\n"
+        "\n"
+        "| Severity | Count |\n"
+        "|---|---:|\n"
+    )
     for level in _SEVERITY_ORDER:
-        lines.append(f"| `{level}` | {counts[level]} |")
+        w(f"| `{level}` | {counts[level]} |\n")
 
-    lines.append("")
-    lines.append("### Findings")
-    lines.append("")
+    w("\n### Findings\n\n")
     if not findings:
-        lines.append("_No findings reported._")
-        return "\n".join(lines)
-
-    lines.extend(
-        [
-            "| Severity | Category | Title | Location | Confidence | Recommendation |",
-            "|---|---|---|---|---:|---|",
-        ]
-    )
-    ordered_findings = sorted(
-        findings,
-        key=lambda item: (
-            _SEVERITY_ORDER.index(str(item.get("severity", "low")).lower())
-            if str(item.get("severity", "low")).lower() in _SEVERITY_ORDER
-            else len(_SEVERITY_ORDER),
-            _finding_location(item),
-            str(item.get("title", "")),
-        ),
-    )
-    for finding in ordered_findings:
-        confidence_value = finding.get("confidence")
-        if isinstance(confidence_value, (int, float)):
-            confidence_text = f"{float(confidence_value):.2f}"
-        else:
-            confidence_text = "-"
-        lines.append(
-            "| "
-            + " | ".join(
-                [
-                    f"`{_escape_markdown_cell(str(finding.get('severity', '-')).lower())}`",
-                    _escape_markdown_cell(finding.get("category", "-")),
-                    _escape_markdown_cell(finding.get("title", "-")),
-                    f"`{_escape_markdown_cell(_finding_location(finding))}`",
-                    confidence_text,
-                    _escape_markdown_cell(finding.get("recommendation", "-")),
-                ]
-            )
-            + " |"
+        w("_No findings reported._")
+        return buf.getvalue()
+
+    w(_MARKDOWN_FINDINGS_HEADER)
+    # The input position breaks ties so the sort never falls through to comparing dicts.
+    decorated = [
+        (
+            _SEVERITY_INDEX.get(str(finding.get("severity", "low")).lower(), _SEVERITY_FALLBACK),
+            _finding_location(finding),
+            str(finding.get("title", "")),
+            position,
+            finding,
         )
-    return "\n".join(lines)
+        for position, finding in enumerate(findings)
+    ]
+    decorated.sort()
+    for _, location, _, _, finding in decorated:
+        confidence_value = _safe_float(finding.get("confidence"))
+        confidence_text = "-" if confidence_value is None else f"{confidence_value:.2f}"
+        w(
+            f"\n| `{_escape_markdown_cell(str(finding.get('severity', '-')).lower())}`"
+            f" | {_escape_markdown_cell(finding.get('category', '-'))}"
+            f" | {_escape_markdown_cell(finding.get('title', '-'))}"
+            f" | `{_escape_markdown_cell(location)}`"
+            f" | {confidence_text}"
+            f" | {_escape_markdown_cell(finding.get('recommendation', '-'))} |"
+        )
+    return buf.getvalue()
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_rule_name(category: str, title: str) -> str:
-    normalized = re.sub(r"[^a-zA-Z0-9]+", "-", f"{category}-{title}".strip().lower()).strip("-")
+    normalized = _RULE_NAME_SEPARATOR_RE.sub("-", f"{category}-{title}".strip().lower()).strip("-")
     return normalized or "finding"
 
 
+@functools.lru_cache(maxsize=4096)
+def _rule_suffix(category: str, title: str) -> str:
+    return hashlib.sha256(f"{category}||{title}".encode("utf-8")).hexdigest()[:10]
+
+
 def _rule_id_for_finding(finding: Dict[str, object]) -> str:
     category = str(finding.get("category", "general")).strip().lower() or "general"
     title = str(finding.get("title", "finding")).strip()
-    suffix = hashlib.sha256(f"{category}||{title}".encode("utf-8")).hexdigest()[:10]
-    return f"mco/{_normalize_rule_name(category, title)}/{suffix}"
+    return f"mco/{_normalize_rule_name(category, title)}/{_rule_suffix(category, title)}"
 
 
 def format_sarif(payload: Dict[str, object], findings: List[Dict[str, object]]) -> Dict[str, object]:
     rules_by_id: Dict[str, Dict[str, object]] = {}
     results: List[Dict[str, object]] = []
+    # Local aliases keep attribute and global lookups out of the per-finding loop.
+    sarif_level = _SARIF_LEVEL_BY_SEVERITY.get
+    rule_id_for = _rule_id_for_finding
+    existing_rule = rules_by_id.get
+    results_append = results.append
 
     for finding in findings:
-        rule_id = _rule_id_for_finding(finding)
+        rule_id = rule_id_for(finding)
         title = str(finding.get("title", "Finding")).strip() or "Finding"
-        recommendation = str(finding.get("recommendation", "")).strip()
         category = str(finding.get("category", "")).strip().lower()
         severity = str(finding.get("severity", "low")).strip().lower()
-        level = _SARIF_LEVEL_BY_SEVERITY.get(severity, "note")
-        confidence = finding.get("confidence")
-        confidence_value = float(confidence) if isinstance(confidence, (int, float)) else 0.0
+        confidence_value = _safe_float(finding.get("confidence"))
         detected_by = finding.get("detected_by")
         if isinstance(detected_by, list):
             detected_by_value = [str(item) for item in detected_by if str(item)]
@@ -133,25 +149,26 @@ def format_sarif(payload: Dict[str, object], findings: List[Dict[str, object]])
             provider = finding.get("provider")
             detected_by_value = [str(provider)] if isinstance(provider, str) and provider else []
 
-        if rule_id not in rules_by_id:
+        if existing_rule(rule_id) is None:
             rule_payload: Dict[str, object] = {
                 "id": rule_id,
                 "name": _normalize_rule_name(category, title),
                 "shortDescription": {"text": title},
                 "properties": {"category": category},
             }
+            recommendation = str(finding.get("recommendation", "")).strip()
             if recommendation:
                 rule_payload["help"] = {"text": recommendation}
             rules_by_id[rule_id] = rule_payload
 
         result_payload: Dict[str, object] = {
             "ruleId": rule_id,
-            "level": level,
+            "level": sarif_level(severity, "note"),
             "message": {"text": title},
             "properties": {
                 "category": category,
                 "severity": severity,
-                "confidence": confidence_value,
+                "confidence": 0.0 if confidence_value is None else confidence_value,
                 "detected_by": detected_by_value,
                 "fingerprint": str(finding.get("fingerprint", "")),
             },
@@ -175,20 +192,14 @@ def format_sarif(payload: Dict[str, object], findings: List[Dict[str, object]])
                     }
                 }
                 result_payload["locations"] = [location]
-        results.append(result_payload)
+        results_append(result_payload)
 
     return {
-        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
-        "version": "2.1.0",
+        "$schema": _SARIF_SCHEMA_URI,
+        "version": _SARIF_VERSION,
         "runs": [
             {
-                "tool": {
-                    "driver": {
-                        "name": "MCO",
-                        "informationUri": "https://github.com/mco-org/mco",
-                        "rules": list(rules_by_id.values()),
-                    }
-                },
+                "tool": {"driver": {**_SARIF_DRIVER, "rules": list(rules_by_id.values())}},
                 "properties": {
                     "decision": payload.get("decision"),
                     "terminal_state": payload.get("terminal_state"),
@@ -198,3 +209,8 @@ def format_sarif(payload: Dict[str, object], findings: List[Dict[str, object]])
             }
         ],
     }
+
+
+def format_sarif_json(payload: Dict[str, object], findings: List[Dict[str, object]]) -> str:
+    # Stays on stdlib json: orjson renders floats differently (1e-05 vs 0.00001) and rejects ints beyond 64 bits.
+    return json.dumps(format_sarif(payload, findings), ensure_ascii=True, indent=2)
@@ -36,13 +36,20 @@ VALID_TRANSITIONS: Dict[TaskState, Set[TaskState]] = {
     TaskState.EXPIRED: set(),
 }
 
+# TaskState is a str enum, so bit positions follow declaration order rather than values.
+_STATE_BIT: Dict[TaskState, int] = {state: 1 << index for index, state in enumerate(TaskState)}
+VALID_MASK: Dict[TaskState, int] = {
+    state: sum(_STATE_BIT[successor] for successor in successors) for state, successors in VALID_TRANSITIONS.items()
+}
+
 
 @dataclass
 class TaskStateMachine:
     state: TaskState = TaskState.DRAFT
 
     def transition(self, next_state: TaskState) -> None:
-        if next_state not in VALID_TRANSITIONS[self.state]:
+        # Unknown targets map to no bit, so they fail the mask check like any illegal transition.
+        if not VALID_MASK[self.state] & _STATE_BIT.get(next_state, 0):
             raise ValueError(f"illegal transition {self.state} -> {next_state}")
         self.state = next_state
 
@@ -62,51 +69,46 @@ class OrchestratorRuntime:
         provider: str,
         runner: Callable[[int], AttemptResult],
     ) -> RunResult:
+        # Negative settings still get the single initial attempt.
+        max_retries = max(self.retry_policy.max_retries, 0)
         attempts = 0
         delays: List[float] = []
         all_warnings = []
+        success = False
         final_error: Optional[ErrorKind] = None
         output = None
 
-        while True:
-            attempts += 1
+        for attempts in range(1, max_retries + 2):
             result = runner(attempts)
             all_warnings.extend(result.warnings)
+            output = result.output
 
             if result.success:
-                output = result.output
-                final = RunResult(
-                    task_id=task_id,
-                    provider=provider,
-                    success=True,
-                    attempts=attempts,
-                    delays_seconds=delays,
-                    output=output,
-                    final_error=None,
-                    warnings=all_warnings,
-                )
-                return final
+                success = True
+                final_error = None
+                break
 
             final_error = result.error_kind or ErrorKind.NORMALIZATION_ERROR
-            should_retry = final_error in RETRYABLE_ERRORS and attempts <= self.retry_policy.max_retries
-            if not should_retry:
-                final = RunResult(
-                    task_id=task_id,
-                    provider=provider,
-                    success=False,
-                    attempts=attempts,
-                    delays_seconds=delays,
-                    output=result.output,
-                    final_error=final_error,
-                    warnings=all_warnings,
-                )
-                return final
-
-            retry_index = attempts
-            delay_seconds = self.retry_policy.compute_delay(retry_index)
+            if final_error not in RETRYABLE_ERRORS or attempts > max_retries:
+                break
+
+            # attempts doubles as the 1-based retry index for the upcoming retry; delays are
+            # computed only when a retry actually happens.
+            delay_seconds = self.retry_policy.compute_delay(attempts)
             delays.append(delay_seconds)
             self.sleep_fn(delay_seconds)
 
+        return RunResult(
+            task_id=task_id,
+            provider=provider,
+            success=success,
+            attempts=attempts,
+            delays_seconds=delays,
+            output=output,
+            final_error=final_error,
+            warnings=all_warnings,
+        )
+
     def evaluate_terminal_state(self, required_provider_success: Dict[str, bool]) -> TaskState:
         if not required_provider_success:
             return TaskState.FAILED
@@ -96,7 +96,10 @@ def _adapter_registry() -> Mapping[str, ProviderAdapter]:
 
 
 def _read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8") if path.exists() else ""
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
 
 
 def _write_json(path: Path, payload: object) -> None:
@@ -46,7 +46,7 @@ class TaskState(str, Enum):
     EXPIRED = "EXPIRED"
 
 
-@dataclass
+@dataclass(frozen=True)
 class AttemptResult:
     success: bool
     output: Optional[Dict[str, Any]] = None
@@ -1,270 +1,356 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import json
+import shutil
 import subprocess
 import tempfile
+import threading
 import time
 import unittest
+from pathlib import Path
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 from runtime.adapters import ClaudeAdapter, CodexAdapter, GeminiAdapter, OpenCodeAdapter, QwenAdapter
-from runtime.adapters.shim import _sanitize_env
-from runtime.contracts import NormalizeContext, TaskInput
+from runtime.adapters.shim import _VERSION_CACHE, _sanitize_env, detect_all, now_iso
+from runtime.contracts import NormalizeContext, ProviderPresence, TaskInput
+from runtime.types import ErrorKind
+
+# Fake providers skip site initialisation and user environment hooks to start faster.
+_PYTHON_C = ("python3", "-S", "-I", "-c")
+# Canned provider output lives in fixture files so the emitters are a plain ``cat``.
+_FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def _cat_fixture(name: str) -> list[str]:
+    return ["cat", str(_FIXTURES / name)]
+
+
+# Codex exits non-zero after emitting a completed turn, which still counts as success.
+_PROVIDER_CASES = (
+    ("claude", ClaudeAdapter, _cat_fixture("fake_claude.json")),
+    ("codex", CodexAdapter, ["bash", "-c", 'cat "$1"; exit 1', "fake-codex", str(_FIXTURES / "fake_codex.jsonl")]),
+    ("gemini", GeminiAdapter, _cat_fixture("fake_gemini.json")),
+    ("opencode", OpenCodeAdapter, _cat_fixture("fake_opencode.json")),
+    ("qwen", QwenAdapter, _cat_fixture("fake_qwen.json")),
+)
+
+
+# Canned probe results shared by the mocked subprocess.run in ShimProbeTests.
+_CP_VERSION = subprocess.CompletedProcess(args=["codex", "--version"], returncode=0, stdout="codex-cli 0.105.0\n", stderr="")
+_AUTH_CP = functools.partial(subprocess.CompletedProcess, args=["codex", "login", "status"], returncode=1, stdout="")
+_CP_CONFIG = _AUTH_CP(stderr="Configuration error: unknown key model_reasoning_effort")
+_CP_NOTLOGGED = _AUTH_CP(stderr="Not logged in. Please run codex login")
+_CP_UNKNOWN = _AUTH_CP(stderr="unexpected runtime failure")
+
+# One scratch root per module run; tests take subdirectories and cleanup happens once.
+_ROOT = ""
+
+
+def setUpModule() -> None:
+    global _ROOT
+    _ROOT = tempfile.mkdtemp(prefix="mco-adapter-contracts-")
+
+
+def tearDownModule() -> None:
+    shutil.rmtree(_ROOT, ignore_errors=True)
 
 
 class AdapterContractTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _VERSION_CACHE.clear()
+        self.addCleanup(_VERSION_CACHE.clear)
+
     def _wait_terminal(self, adapter: object, ref: object, timeout_seconds: float = 5.0) -> object:
-        start = time.time()
-        while time.time() - start < timeout_seconds:
+        # Watchdog: a run still alive at the deadline is cancelled so no child outlives the test.
+        expired = threading.Event()
+
+        def _expire() -> None:
+            expired.set()
+            adapter.cancel(ref)  # type: ignore[attr-defined]
+
+        watchdog = threading.Timer(timeout_seconds, _expire)
+        watchdog.daemon = True
+        watchdog.start()
+        self.addCleanup(watchdog.cancel)
+
+        wait = getattr(adapter, "wait", None)
+        if callable(wait):
+            # The grace period lets the watchdog's cancel, not this wait, end a stuck run.
+            finished = wait(ref, timeout_seconds + 1.0)
+            watchdog.cancel()
+            if not finished or expired.is_set():
+                self.fail("adapter run did not reach terminal state")
+            status = adapter.poll(ref)  # type: ignore[attr-defined]
+            self.assertTrue(status.completed)
+            return status
+        while not expired.wait(0.05):
             status = adapter.poll(ref)  # type: ignore[attr-defined]
             if status.completed:
+                watchdog.cancel()
                 return status
-            time.sleep(0.05)
         self.fail("adapter run did not reach terminal state")
 
-    def test_claude_adapter_run_poll_normalize(self) -> None:
-        adapter = ClaudeAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-claude-contract",
-                prompt="ignored in contract test",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": [
-                        "python3",
-                        "-c",
-                        'print(\'{"findings":[{"finding_id":"f1","severity":"high","category":"bug","title":"t","evidence":{"file":"a.py","line":1,"snippet":"x"},"recommendation":"r","confidence":0.9,"fingerprint":"fp1"}]}\')',
-                    ],
-                },
-            )
-            ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertTrue(status.completed)
-            self.assertEqual(status.attempt_state, "SUCCEEDED")
-            self.assertIsNotNone(status.output_path)
-
-            with open(f"{tmpdir}/{task.task_id}/raw/claude.stdout.log", "r", encoding="utf-8") as fh:
-                raw = fh.read()
-            findings = adapter.normalize(
-                raw,
-                NormalizeContext(task_id=task.task_id, provider="claude", repo_root=tmpdir, raw_ref="raw/claude.stdout.log"),
-            )
-            self.assertEqual(len(findings), 1)
-            self.assertEqual(findings[0].provider, "claude")
-
-    def test_codex_adapter_run_poll_with_non_zero_exit(self) -> None:
-        adapter = CodexAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-codex-contract",
-                prompt="ignored in contract test",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": [
-                        "bash",
-                        "-lc",
-                        'echo \'{"type":"turn.completed"}\'; echo \'{"findings":[{"finding_id":"f2","severity":"medium","category":"maintainability","title":"m","evidence":{"file":"b.py","line":2,"snippet":"y"},"recommendation":"r2","confidence":0.6,"fingerprint":"fp2"}]}\'; exit 1',
-                    ],
-                },
-            )
-            ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertEqual(status.attempt_state, "SUCCEEDED")
-            self.assertIsNone(status.error_kind)
-
-            with open(f"{tmpdir}/{task.task_id}/raw/codex.stdout.log", "r", encoding="utf-8") as fh:
-                raw = fh.read()
-            findings = adapter.normalize(
-                raw,
-                NormalizeContext(task_id=task.task_id, provider="codex", repo_root=tmpdir, raw_ref="raw/codex.stdout.log"),
-            )
-            self.assertEqual(len(findings), 1)
-            self.assertEqual(findings[0].provider, "codex")
+    def test_adapters_run_poll_normalize(self) -> None:
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        for provider, adapter_cls, command in _PROVIDER_CASES:
+            with self.subTest(provider=provider):
+                adapter = adapter_cls()
+                task = TaskInput(
+                    task_id=f"task-{provider}-contract",
+                    prompt="ignored in contract test",
+                    repo_root=tmpdir,
+                    target_paths=["."],
+                    metadata={"artifact_root": tmpdir, "command_override": command},
+                )
+                ref = adapter.run(task)
+                status = self._wait_terminal(adapter, ref)
+                self.assertEqual(status.attempt_state, "SUCCEEDED")
+                self.assertIsNone(status.error_kind)
+                self.assertIsNotNone(status.output_path)
+
+                raw_ref = f"raw/{provider}.stdout.log"
+                raw = (Path(tmpdir) / task.task_id / raw_ref).read_text(encoding="utf-8")
+                findings = adapter.normalize(
+                    raw,
+                    NormalizeContext(task_id=task.task_id, provider=provider, repo_root=tmpdir, raw_ref=raw_ref),
+                )
+                self.assertEqual(len(findings), 1)
+                self.assertEqual(findings[0].provider, provider)
 
     def test_codex_adapter_includes_output_schema_when_provided(self) -> None:
         adapter = CodexAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-codex-schema",
-                prompt="review",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "output_schema_path": "/tmp/review.schema.json",
-                },
-            )
-            cmd = adapter._build_command(task)  # type: ignore[attr-defined]
-            self.assertIn("--output-schema", cmd)
-            self.assertIn("/tmp/review.schema.json", cmd)
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-codex-schema",
+            prompt="review",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={
+                "artifact_root": tmpdir,
+                "output_schema_path": "/tmp/review.schema.json",
+            },
+        )
+        cmd = adapter._build_command(task)  # type: ignore[attr-defined]
+        self.assertIn("--output-schema", cmd)
+        self.assertIn("/tmp/review.schema.json", cmd)
 
     def test_adapter_cancel(self) -> None:
         adapter = ClaudeAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-cancel-contract",
-                prompt="ignored",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": ["python3", "-c", "import time; time.sleep(10)"],
-                },
-            )
-            ref = adapter.run(task)
-            adapter.cancel(ref)
-            status = self._wait_terminal(adapter, ref)
-            self.assertTrue(status.completed)
-            self.assertIn(status.attempt_state, ("FAILED", "SUCCEEDED", "EXPIRED"))
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-cancel-contract",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={
+                "artifact_root": tmpdir,
+                "command_override": [*_PYTHON_C, "import time; time.sleep(2)"],
+            },
+        )
+        ref = adapter.run(task)
+        process = adapter._runs[ref.run_id].process  # type: ignore[attr-defined]
+        adapter.cancel(ref)
+        # A working cancel reaps the child well before its sleep would end on its own.
+        self.assertLess(process.wait(timeout=1.0), 0)
+        status = self._wait_terminal(adapter, ref, timeout_seconds=2.5)
+        self.assertTrue(status.completed)
+        self.assertIn(status.attempt_state, ("FAILED", "SUCCEEDED", "EXPIRED"))
 
     def test_run_handle_is_released_after_terminal_poll(self) -> None:
         adapter = ClaudeAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-handle-release",
-                prompt="ignored",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": ["python3", "-c", "print('ok')"],
-                },
-            )
-            ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertTrue(status.completed)
-            self.assertNotIn(ref.run_id, adapter._runs)  # type: ignore[attr-defined]
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-handle-release",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={
+                "artifact_root": tmpdir,
+                "command_override": [*_PYTHON_C, "print('ok')"],
+            },
+        )
+        ref = adapter.run(task)
+        status = self._wait_terminal(adapter, ref)
+        self.assertTrue(status.completed)
+        self.assertNotIn(ref.run_id, adapter._runs)  # type: ignore[attr-defined]
+
+    def test_wait_reports_timeout_for_running_process(self) -> None:
+        adapter = ClaudeAdapter()
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-wait-timeout",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={"artifact_root": tmpdir, "command_override": [*_PYTHON_C, "import time; time.sleep(2)"]},
+        )
+        ref = adapter.run(task)
+        self.assertFalse(adapter.wait(ref, timeout=0.05))
+        adapter.cancel(ref)
+        self.assertTrue(adapter.wait(ref, timeout=1.0))
 
     def test_cancel_releases_finished_run_handle_without_poll(self) -> None:
         adapter = ClaudeAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-cancel-release-finished",
-                prompt="ignored",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": ["python3", "-c", "print('done')"],
-                },
-            )
-            ref = adapter.run(task)
-            time.sleep(0.2)
-            adapter.cancel(ref)
-            self.assertNotIn(ref.run_id, adapter._runs)  # type: ignore[attr-defined]
-
-    def test_gemini_adapter_run_poll_normalize(self) -> None:
-        adapter = GeminiAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-gemini-contract",
-                prompt="ignored in contract test",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": [
-                        "python3",
-                        "-c",
-                        'print(\'{"findings":[{"finding_id":"g1","severity":"low","category":"maintainability","title":"g","evidence":{"file":"g.py","line":3,"snippet":"z"},"recommendation":"rg","confidence":0.7,"fingerprint":"gfp"}]}\')',
-                    ],
-                },
-            )
-            ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertEqual(status.attempt_state, "SUCCEEDED")
-            with open(f"{tmpdir}/{task.task_id}/raw/gemini.stdout.log", "r", encoding="utf-8") as fh:
-                raw = fh.read()
-            findings = adapter.normalize(
-                raw,
-                NormalizeContext(task_id=task.task_id, provider="gemini", repo_root=tmpdir, raw_ref="raw/gemini.stdout.log"),
-            )
-            self.assertEqual(len(findings), 1)
-
-    def test_opencode_adapter_run_poll_normalize(self) -> None:
-        adapter = OpenCodeAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-opencode-contract",
-                prompt="ignored in contract test",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": [
-                        "python3",
-                        "-c",
-                        'print(\'{"findings":[{"finding_id":"o1","severity":"medium","category":"performance","title":"o","evidence":{"file":"o.py","line":2,"snippet":"q"},"recommendation":"ro","confidence":0.6,"fingerprint":"ofp"}]}\')',
-                    ],
-                },
-            )
-            ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertEqual(status.attempt_state, "SUCCEEDED")
-            with open(f"{tmpdir}/{task.task_id}/raw/opencode.stdout.log", "r", encoding="utf-8") as fh:
-                raw = fh.read()
-            findings = adapter.normalize(
-                raw,
-                NormalizeContext(task_id=task.task_id, provider="opencode", repo_root=tmpdir, raw_ref="raw/opencode.stdout.log"),
-            )
-            self.assertEqual(len(findings), 1)
-
-    def test_qwen_adapter_run_poll_normalize(self) -> None:
-        adapter = QwenAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-qwen-contract",
-                prompt="ignored in contract test",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": [
-                        "python3",
-                        "-c",
-                        'print(\'{"findings":[{"finding_id":"q1","severity":"high","category":"security","title":"q","evidence":{"file":"q.py","line":4,"snippet":"w"},"recommendation":"rq","confidence":0.9,"fingerprint":"qfp"}]}\')',
-                    ],
-                },
-            )
-            ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertEqual(status.attempt_state, "SUCCEEDED")
-            with open(f"{tmpdir}/{task.task_id}/raw/qwen.stdout.log", "r", encoding="utf-8") as fh:
-                raw = fh.read()
-            findings = adapter.normalize(
-                raw,
-                NormalizeContext(task_id=task.task_id, provider="qwen", repo_root=tmpdir, raw_ref="raw/qwen.stdout.log"),
-            )
-            self.assertEqual(len(findings), 1)
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-cancel-release-finished",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={
+                "artifact_root": tmpdir,
+                "command_override": [*_PYTHON_C, "print('done')"],
+            },
+        )
+        ref = adapter.run(task)
+        adapter._runs[ref.run_id].process.wait(timeout=5.0)  # type: ignore[attr-defined]
+        adapter.cancel(ref)
+        self.assertNotIn(ref.run_id, adapter._runs)  # type: ignore[attr-defined]
 
-    def test_sanitize_env_strips_claudecode(self) -> None:
-        with patch.dict("os.environ", {"CLAUDECODE": "1", "HOME": "/tmp"}):
-            env = _sanitize_env()
-            self.assertNotIn("CLAUDECODE", env)
-            self.assertIn("HOME", env)
+    def test_merge_stderr_writes_single_log_and_classifies_combined_output(self) -> None:
+        adapter = ClaudeAdapter()
+        adapter.merge_stderr = True
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-merge-stderr",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={
+                "artifact_root": tmpdir,
+                "command_override": ["bash", "-c", "echo out; echo 'rate limit hit' >&2; exit 1"],
+            },
+        )
+        ref = adapter.run(task)
+        status = self._wait_terminal(adapter, ref)
+        raw_dir = Path(tmpdir) / task.task_id / "raw"
+        self.assertEqual((raw_dir / "claude.stdout.log").read_text(encoding="utf-8"), "out\nrate limit hit\n")
+        self.assertFalse((raw_dir / "claude.stderr.log").exists())
+        self.assertEqual(status.attempt_state, "FAILED")
+        self.assertEqual(status.error_kind, ErrorKind.RETRYABLE_RATE_LIMIT)
+
+    def test_now_iso_reuses_timestamp_within_granularity(self) -> None:
+        with patch("runtime.adapters.shim._LAST_ISO", (time.monotonic(), "cached")):
+            self.assertEqual(now_iso(60.0), "cached")
+            self.assertNotEqual(now_iso(), "cached")
+        with patch("runtime.adapters.shim._LAST_ISO", (time.monotonic() - 120.0, "stale")):
+            self.assertNotEqual(now_iso(60.0), "stale")
+
+    def test_poll_classifies_markers_beyond_first_64_kib_of_logs(self) -> None:
+        adapter = CodexAdapter()
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        emitter = (
+            "import sys\n"
+            "sys.stdout.write('{\"type\":\"turn.completed\"}\\n' + 'o' * 70000 + '\\n')\n"
+            "sys.stderr.write('mcp server failed to start\\n' + 'e' * 70000 + '\\n')\n"
+            "sys.exit(1)\n"
+        )
+        task = TaskInput(
+            task_id="task-large-logs",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={"artifact_root": tmpdir, "command_override": [*_PYTHON_C, emitter]},
+        )
+        ref = adapter.run(task)
+        status = self._wait_terminal(adapter, ref)
+        self.assertEqual(status.attempt_state, "SUCCEEDED")
+        result = json.loads(Path(status.output_path).read_text(encoding="utf-8"))  # type: ignore[arg-type]
+        self.assertEqual(result["warnings"], ["provider_warning_mcp_startup"])
 
     def test_popen_receives_sanitized_env(self) -> None:
         adapter = ClaudeAdapter()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            task = TaskInput(
-                task_id="task-env-check",
-                prompt="ignored",
-                repo_root=tmpdir,
-                target_paths=["."],
-                metadata={
-                    "artifact_root": tmpdir,
-                    "command_override": ["python3", "-c", "import os, sys; sys.exit(0 if 'CLAUDECODE' not in os.environ else 1)"],
-                },
-            )
-            with patch.dict("os.environ", {"CLAUDECODE": "1"}):
-                ref = adapter.run(task)
-            status = self._wait_terminal(adapter, ref)
-            self.assertTrue(status.completed)
-            self.assertEqual(status.attempt_state, "SUCCEEDED")
+        tmpdir = tempfile.mkdtemp(dir=_ROOT)
+        task = TaskInput(
+            task_id="task-env-check",
+            prompt="ignored",
+            repo_root=tmpdir,
+            target_paths=["."],
+            metadata={
+                "artifact_root": tmpdir,
+                "command_override": [*_PYTHON_C, "import os, sys; sys.exit(0 if 'CLAUDECODE' not in os.environ else 1)"],
+            },
+        )
+        with patch.dict("os.environ", {"CLAUDECODE": "1"}):
+            ref = adapter.run(task)
+        status = self._wait_terminal(adapter, ref)
+        self.assertTrue(status.completed)
+        self.assertEqual(status.attempt_state, "SUCCEEDED")
+
+    def test_resolved_binary_and_env_are_cached_per_adapter(self) -> None:
+        adapter = CodexAdapter()
+        with patch.dict("os.environ", {"CLAUDECODE": "1", "PATH": "/tmp/bin"}):
+            with patch("runtime.adapters.shim.shutil.which", return_value="/mock/bin/codex") as mocked_which:
+                self.assertEqual(adapter._resolve_binary(), "/mock/bin/codex")  # type: ignore[attr-defined]
+                self.assertEqual(adapter._resolve_binary(), "/mock/bin/codex")  # type: ignore[attr-defined]
+        mocked_which.assert_called_once_with("codex", path="/tmp/bin")
+        env = adapter._sanitized_env  # type: ignore[attr-defined]
+        self.assertIs(env, adapter._sanitized_env)  # type: ignore[attr-defined]
+        self.assertNotIn("CLAUDECODE", env)
+
+    def test_detect_all_returns_async_and_sync_probes_in_order(self) -> None:
+        adapter = CodexAdapter()
+
+        class _SyncOnlyAdapter:
+            def detect(self) -> ProviderPresence:
+                return ProviderPresence(provider="qwen", detected=False, binary_path=None, version=None, auth_ok=False)
+
+        probe_results = {
+            "--version": (0, "codex-cli 0.105.0\n", ""),
+            "login": (1, "", "Not logged in. Please run codex login"),
+        }
+        mocked_probe = AsyncMock(side_effect=lambda cmd, env: probe_results[cmd[1]])
+        with patch("runtime.adapters.shim.shutil.which", return_value="/mock/bin/codex"):
+            with patch("runtime.adapters.shim._run_probe_async", mocked_probe):
+                codex_presence, qwen_presence = asyncio.run(detect_all([adapter, _SyncOnlyAdapter()]))
+        self.assertEqual(mocked_probe.await_count, 2)
+        self.assertEqual(codex_presence.binary_path, "/mock/bin/codex")  # type: ignore[union-attr]
+        self.assertEqual(codex_presence.version, "codex-cli 0.105.0")  # type: ignore[union-attr]
+        self.assertEqual(codex_presence.reason, "auth_check_failed")  # type: ignore[union-attr]
+        self.assertEqual(qwen_presence.provider, "qwen")  # type: ignore[union-attr]
+
+    def test_detect_all_overlaps_adapter_probes(self) -> None:
+        # Each probe waits for the other to start; run one after another, the first would time out.
+        started: list[str] = []
+
+        class _RendezvousAdapter:
+            def __init__(self, provider: str, both_started: asyncio.Event) -> None:
+                self.provider = provider
+                self.both_started = both_started
+
+            async def detect_async(self) -> ProviderPresence:
+                started.append(self.provider)
+                if len(started) == 2:
+                    self.both_started.set()
+                await asyncio.wait_for(self.both_started.wait(), timeout=1.0)
+                return ProviderPresence(provider=self.provider, detected=True, binary_path=None, version=None, auth_ok=True)
+
+        async def _probe() -> list:
+            both_started = asyncio.Event()
+            adapters = [_RendezvousAdapter("claude", both_started), _RendezvousAdapter("codex", both_started)]
+            return await detect_all(adapters)
+
+        presences = asyncio.run(_probe())
+        self.assertEqual([presence.provider for presence in presences], ["claude", "codex"])  # type: ignore[union-attr]
+
+
+class ShimProbeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _VERSION_CACHE.clear()
+        self.addCleanup(_VERSION_CACHE.clear)
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        stack.enter_context(patch.dict("os.environ", {"CLAUDECODE": "1", "HOME": "/tmp", "PATH": "/tmp/bin"}))
+        self._mocked_run = stack.enter_context(patch("runtime.adapters.shim.subprocess.run"))
+
+    def test_sanitize_env_strips_claudecode(self) -> None:
+        env = _sanitize_env()
+        self.assertNotIn("CLAUDECODE", env)
+        self.assertIn("HOME", env)
 
     def test_detect_uses_which_result_for_binary_path(self) -> None:
         adapter = CodexAdapter()
@@ -278,54 +364,36 @@ class AdapterContractTests(unittest.TestCase):
         self.assertEqual(presence.reason, "probe_config_error")
 
     def test_probe_version_uses_sanitized_env(self) -> None:
-        adapter = CodexAdapter()
-        with patch.dict("os.environ", {"CLAUDECODE": "1", "PATH": "/tmp/bin"}):
-            with patch("runtime.adapters.shim.subprocess.run") as mocked_run:
-                mocked_run.return_value = subprocess.CompletedProcess(
-                    args=["codex", "--version"],
-                    returncode=0,
-                    stdout="codex-cli 0.105.0\n",
-                    stderr="",
-                )
-                version = adapter._probe_version("/mock/bin/codex")  # type: ignore[attr-defined]
+        self._mocked_run.return_value = _CP_VERSION
+        version = CodexAdapter()._probe_version("/mock/bin/codex")  # type: ignore[attr-defined]
         self.assertEqual(version, "codex-cli 0.105.0")
-        kwargs = mocked_run.call_args.kwargs
+        kwargs = self._mocked_run.call_args.kwargs
         self.assertIn("env", kwargs)
         self.assertNotIn("CLAUDECODE", kwargs["env"])
         self.assertEqual(kwargs["env"].get("PATH"), "/tmp/bin")
 
+    def test_probe_version_is_cached_per_binary(self) -> None:
+        self._mocked_run.return_value = _CP_VERSION
+        self.assertEqual(CodexAdapter()._probe_version("/mock/bin/codex"), "codex-cli 0.105.0")  # type: ignore[attr-defined]
+        self.assertEqual(CodexAdapter()._probe_version("/mock/bin/codex"), "codex-cli 0.105.0")  # type: ignore[attr-defined]
+        self._mocked_run.assert_called_once()
+
     def test_probe_auth_reason_classification(self) -> None:
         adapter = CodexAdapter()
-        with patch("runtime.adapters.shim.subprocess.run") as mocked_run:
-            mocked_run.return_value = subprocess.CompletedProcess(
-                args=["codex", "login", "status"],
-                returncode=1,
-                stdout="",
-                stderr="Configuration error: unknown key model_reasoning_effort",
-            )
-            ok, reason = adapter._probe_auth("/mock/bin/codex")  # type: ignore[attr-defined]
-            self.assertFalse(ok)
-            self.assertEqual(reason, "probe_config_error")
-
-            mocked_run.return_value = subprocess.CompletedProcess(
-                args=["codex", "login", "status"],
-                returncode=1,
-                stdout="",
-                stderr="Not logged in. Please run codex login",
-            )
-            ok, reason = adapter._probe_auth("/mock/bin/codex")  # type: ignore[attr-defined]
-            self.assertFalse(ok)
-            self.assertEqual(reason, "auth_check_failed")
-
-            mocked_run.return_value = subprocess.CompletedProcess(
-                args=["codex", "login", "status"],
-                returncode=1,
-                stdout="",
-                stderr="unexpected runtime failure",
-            )
-            ok, reason = adapter._probe_auth("/mock/bin/codex")  # type: ignore[attr-defined]
-            self.assertFalse(ok)
-            self.assertEqual(reason, "probe_unknown_error")
+        self._mocked_run.return_value = _CP_CONFIG
+        ok, reason = adapter._probe_auth("/mock/bin/codex")  # type: ignore[attr-defined]
+        self.assertFalse(ok)
+        self.assertEqual(reason, "probe_config_error")
+
+        self._mocked_run.return_value = _CP_NOTLOGGED
+        ok, reason = adapter._probe_auth("/mock/bin/codex")  # type: ignore[attr-defined]
+        self.assertFalse(ok)
+        self.assertEqual(reason, "auth_check_failed")
+
+        self._mocked_run.return_value = _CP_UNKNOWN
+        ok, reason = adapter._probe_auth("/mock/bin/codex")  # type: ignore[attr-defined]
+        self.assertFalse(ok)
+        self.assertEqual(reason, "probe_unknown_error")
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ import unittest
 from contextlib import redirect_stderr, redirect_stdout
 from unittest.mock import patch
 
-from runtime.cli import build_parser, main
+from runtime.cli import _doctor_provider_presence, build_parser, main
 from runtime.contracts import ProviderPresence
 
 
@@ -57,6 +57,34 @@ class CliDoctorTests(unittest.TestCase):
         self.assertEqual(payload["providers"]["codex"]["ready"], False)
         self.assertEqual(payload["providers"]["codex"]["reason"], "auth_check_failed")
 
+    def test_doctor_presence_maps_probe_errors_and_keeps_provider_order(self) -> None:
+        class _FailingAdapter:
+            async def detect_async(self) -> ProviderPresence:
+                raise RuntimeError("probe crashed")
+
+        class _ReadyAdapter:
+            async def detect_async(self) -> ProviderPresence:
+                return ProviderPresence(
+                    provider="codex",
+                    detected=True,
+                    binary_path="/usr/local/bin/codex",
+                    version="0.105.0",
+                    auth_ok=True,
+                    reason="ok",
+                )
+
+        registry = {"claude": _FailingAdapter(), "codex": _ReadyAdapter()}
+        with patch("runtime.cli._doctor_adapter_registry", return_value=registry):
+            presence = _doctor_provider_presence(["codex", "claude"])
+
+        self.assertEqual(list(presence), ["codex", "claude"])
+        self.assertTrue(presence["codex"].detected)
+        self.assertEqual(presence["codex"].reason, "ok")
+        self.assertFalse(presence["claude"].detected)
+        self.assertFalse(presence["claude"].auth_ok)
+        self.assertEqual(presence["claude"].provider, "claude")
+        self.assertEqual(presence["claude"].reason, "probe_error:RuntimeError")
+
     def test_doctor_rejects_invalid_provider_set(self) -> None:
         with redirect_stderr(io.StringIO()):
             exit_code = main(["doctor", "--providers", "unknown"])
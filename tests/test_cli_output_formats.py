@@ -1,30 +1,40 @@
 from __future__ import annotations
 
+import dataclasses
 import io
 import json
 import tempfile
 import unittest
-from contextlib import redirect_stderr, redirect_stdout
 from unittest.mock import patch
 
 from runtime.cli import main
 from runtime.review_engine import ReviewResult
 
+# Formatters only read findings, so the evidence dict and base result can be shared across tests.
+_EVIDENCE = {"file": "runtime/x.py", "line": 42, "snippet": "x.y"}
+_BASE_RESULT = ReviewResult(
+    task_id="task-review-format",
+    artifact_root=None,
+    decision="PASS",
+    terminal_state="COMPLETED",
+    provider_results={"codex": {"success": True}},
+    findings_count=1,
+    parse_success_count=1,
+    parse_failure_count=0,
+    schema_valid_count=1,
+    dropped_findings_count=0,
+)
+
+
+def _result(**overrides: object) -> ReviewResult:
+    return dataclasses.replace(_BASE_RESULT, **overrides)
+
 
 class CliOutputFormatsTests(unittest.TestCase):
     def test_review_markdown_pr_format_output(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
-            result = ReviewResult(
+            result = _result(
                 task_id="task-review-format-1",
-                artifact_root=None,
-                decision="PASS",
-                terminal_state="COMPLETED",
-                provider_results={"codex": {"success": True}},
-                findings_count=1,
-                parse_success_count=1,
-                parse_failure_count=0,
-                schema_valid_count=1,
-                dropped_findings_count=0,
                 findings=[
                     {
                         "severity": "high",
@@ -32,66 +42,57 @@ class CliOutputFormatsTests(unittest.TestCase):
                         "title": "Possible nil dereference",
                         "recommendation": "Guard against None before access",
                         "confidence": 0.91,
-                        "evidence": {"file": "runtime/x.py", "line": 42, "snippet": "x.y"},
+                        "evidence": _EVIDENCE,
                     }
                 ],
             )
             output = io.StringIO()
             with patch("runtime.cli.run_review", return_value=result):
-                with redirect_stdout(output):
-                    exit_code = main(
-                        [
-                            "review",
-                            "--repo",
-                            tmpdir,
-                            "--prompt",
-                            "review",
-                            "--providers",
-                            "codex",
-                            "--format",
-                            "markdown-pr",
-                        ]
-                    )
-        report = output.getvalue()
-        self.assertEqual(exit_code, 0)
-        self.assertIn("## MCO Review Summary", report)
-        self.assertIn("| Severity | Category | Title | Location | Confidence | Recommendation |", report)
-        self.assertIn("Possible nil dereference", report)
-        self.assertIn("runtime/x.py:42", report)
-
-    def test_run_rejects_markdown_pr_format(self) -> None:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            stderr = io.StringIO()
-            with redirect_stderr(stderr):
                 exit_code = main(
                     [
-                        "run",
+                        "review",
                         "--repo",
                         tmpdir,
                         "--prompt",
-                        "run",
+                        "review",
                         "--providers",
                         "codex",
                         "--format",
                         "markdown-pr",
-                    ]
+                    ],
+                    stdout=output,
                 )
+        report = output.getvalue()
+        self.assertEqual(exit_code, 0)
+        self.assertIn("## MCO Review Summary", report)
+        self.assertIn("| Severity | Category | Title | Location | Confidence | Recommendation |", report)
+        self.assertIn("Possible nil dereference", report)
+        self.assertIn("runtime/x.py:42", report)
+
+    def test_run_rejects_markdown_pr_format(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stderr = io.StringIO()
+            exit_code = main(
+                [
+                    "run",
+                    "--repo",
+                    tmpdir,
+                    "--prompt",
+                    "run",
+                    "--providers",
+                    "codex",
+                    "--format",
+                    "markdown-pr",
+                ],
+                stderr=stderr,
+            )
         self.assertEqual(exit_code, 2)
         self.assertIn("supported only for review", stderr.getvalue())
 
     def test_review_sarif_format_output(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
-            result = ReviewResult(
+            result = _result(
                 task_id="task-review-format-2",
-                artifact_root=None,
-                decision="PASS",
-                terminal_state="COMPLETED",
-                provider_results={"codex": {"success": True}},
-                findings_count=1,
-                parse_success_count=1,
-                parse_failure_count=0,
-                schema_valid_count=1,
-                dropped_findings_count=0,
                 findings=[
                     {
                         "severity": "critical",
@@ -99,51 +100,51 @@ class CliOutputFormatsTests(unittest.TestCase):
                         "title": "Hardcoded credential",
                         "recommendation": "Read from env var",
                         "confidence": 0.95,
-                        "evidence": {"file": "runtime/x.py", "line": 7, "snippet": "API_KEY='x'"},
+                        "evidence": _EVIDENCE,
                         "detected_by": ["claude", "qwen"],
                     }
                 ],
             )
             output = io.StringIO()
             with patch("runtime.cli.run_review", return_value=result):
-                with redirect_stdout(output):
-                    exit_code = main(
-                        [
-                            "review",
-                            "--repo",
-                            tmpdir,
-                            "--prompt",
-                            "review",
-                            "--providers",
-                            "codex",
-                            "--format",
-                            "sarif",
-                        ]
-                    )
-        payload = json.loads(output.getvalue())
-        self.assertEqual(exit_code, 0)
-        self.assertEqual(payload.get("version"), "2.1.0")
-        runs = payload.get("runs", [])
-        self.assertEqual(len(runs), 1)
-        self.assertGreaterEqual(len(runs[0].get("results", [])), 1)
-
-    def test_run_rejects_sarif_format(self) -> None:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            stderr = io.StringIO()
-            with redirect_stderr(stderr):
                 exit_code = main(
                     [
-                        "run",
+                        "review",
                         "--repo",
                         tmpdir,
                         "--prompt",
-                        "run",
+                        "review",
                         "--providers",
                         "codex",
                         "--format",
                         "sarif",
-                    ]
+                    ],
+                    stdout=output,
                 )
+        payload = json.loads(output.getvalue())
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(payload.get("version"), "2.1.0")
+        runs = payload.get("runs", [])
+        self.assertEqual(len(runs), 1)
+        self.assertGreaterEqual(len(runs[0].get("results", [])), 1)
+
+    def test_run_rejects_sarif_format(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stderr = io.StringIO()
+            exit_code = main(
+                [
+                    "run",
+                    "--repo",
+                    tmpdir,
+                    "--prompt",
+                    "run",
+                    "--providers",
+                    "codex",
+                    "--format",
+                    "sarif",
+                ],
+                stderr=stderr,
+            )
         self.assertEqual(exit_code, 2)
         self.assertIn("supported only for review", stderr.getvalue())
 
@@ -28,6 +28,11 @@ class ConfigTests(unittest.TestCase):
         self.assertEqual(second.providers, ["claude", "codex"])
         self.assertEqual(second.policy.provider_timeouts, DEFAULT_PROVIDER_TIMEOUTS)
 
+    def test_default_provider_timeouts_are_read_only(self) -> None:
+        with self.assertRaises(TypeError):
+            DEFAULT_PROVIDER_TIMEOUTS["qwen"] = 900  # type: ignore[index]
+        self.assertIsInstance(ReviewConfig().policy.provider_timeouts, dict)
+
 
 if __name__ == "__main__":
     unittest.main()
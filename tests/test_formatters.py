@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import json
 import unittest
 
-from runtime.formatters import format_markdown_pr, format_sarif
+from runtime.formatters import format_markdown_pr, format_sarif, format_sarif_json
 
 
 class FormatterTests(unittest.TestCase):
@@ -30,6 +31,27 @@ class FormatterTests(unittest.TestCase):
         self.assertIn("allowlist<br>and avoid interpolation", text)
         self.assertIn("`a.py:10`", text)
 
+    def test_markdown_pr_escapes_backslash_before_pipe(self) -> None:
+        payload = {"decision": "PASS", "terminal_state": "COMPLETED", "findings_count": 1}
+        findings = [{"severity": "low", "category": "sec\\|ops", "title": "t", "evidence": {"file": "a.py", "line": 1}}]
+        text = format_markdown_pr(payload, findings)
+        self.assertIn("| sec\\\\\\|ops |", text)
+
+    def test_markdown_pr_orders_rows_by_severity_then_location(self) -> None:
+        payload = {"decision": "FAIL", "terminal_state": "COMPLETED", "findings_count": 4}
+        findings = [
+            {"severity": "unknown", "title": "odd", "evidence": {"file": "a.py", "line": 1}},
+            {"severity": "low", "title": "same", "evidence": {"file": "b.py", "line": 2}},
+            {"severity": "CRITICAL", "title": "first", "evidence": {"file": "z.py", "line": 9}},
+            {"severity": "low", "title": "same", "evidence": {"file": "a.py", "line": 2}},
+        ]
+        rows = [line for line in format_markdown_pr(payload, findings).splitlines() if line.startswith("| `")]
+        finding_rows = rows[len(("critical", "high", "medium", "low")):]
+        self.assertEqual(
+            [row.split(" | ")[3] for row in finding_rows],
+            ["`z.py:9`", "`a.py:2`", "`b.py:2`", "`a.py:1`"],
+        )
+
     def test_markdown_pr_handles_empty_findings(self) -> None:
         payload = {
             "decision": "PASS",
@@ -68,12 +90,50 @@ class FormatterTests(unittest.TestCase):
         )
         self.assertEqual(results[0]["properties"]["detected_by"], ["claude", "qwen"])  # type: ignore[index]
 
+    def test_sarif_rule_ids_collapse_non_alphanumeric_runs(self) -> None:
+        payload = {"decision": "PASS", "terminal_state": "COMPLETED", "findings_count": 2}
+        findings = [
+            {"severity": "low", "category": "Security", "title": "Ünsafe  shell -- usage!"},
+            {"severity": "low", "category": "", "title": "***"},
+        ]
+        rules = format_sarif(payload, findings)["runs"][0]["tool"]["driver"]["rules"]  # type: ignore[index]
+        self.assertEqual(rules[0]["name"], "security-nsafe-shell-usage")
+        self.assertTrue(rules[0]["id"].startswith("mco/security-nsafe-shell-usage/"))
+        self.assertEqual(rules[1]["name"], "finding")
+
     def test_sarif_handles_empty_findings(self) -> None:
         sarif = format_sarif({"decision": "PASS", "terminal_state": "COMPLETED", "findings_count": 0}, [])
         runs = sarif.get("runs", [])
         self.assertEqual(len(runs), 1)
         self.assertEqual(runs[0].get("results"), [])
 
+    def test_sarif_json_matches_stdlib_encoding(self) -> None:
+        payload = {"decision": "FAIL", "terminal_state": "COMPLETED", "findings_count": 2}
+        findings = [
+            {
+                "severity": "high",
+                "category": "security",
+                "title": "Unsafe shell",
+                "confidence": 0.75,
+                "evidence": {"file": "a.py", "line": 3, "snippet": "os.system(cmd)"},
+            },
+            {"severity": "low", "category": "style", "title": "Ünicode naming"},
+            {
+                "severity": "medium",
+                "category": "bug",
+                "title": "Huge line",
+                "confidence": 1e-05,
+                "evidence": {"file": "b.py", "line": 2**70},
+            },
+        ]
+        for subset in (findings[:1], findings):
+            expected = json.dumps(format_sarif(payload, subset), ensure_ascii=True, indent=2)
+            self.assertEqual(format_sarif_json(payload, subset), expected)
+        text = format_sarif_json(payload, findings)
+        self.assertIn('"confidence": 1e-05', text)
+        self.assertIn(f'"startLine": {2**70}', text)
+        self.assertIn("\\u00dcnicode naming", text)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,54 +1,118 @@
 from __future__ import annotations
 
-import tempfile
 import unittest
+from dataclasses import FrozenInstanceError
 
-from runtime.orchestrator import OrchestratorRuntime, TaskStateMachine
+from runtime.orchestrator import VALID_TRANSITIONS, OrchestratorRuntime, TaskStateMachine
 from runtime.retry import RetryPolicy
-from runtime.types import AttemptResult, ErrorKind, TaskState, WarningKind
+from runtime.types import AttemptResult, ErrorKind, RunResult, TaskState, WarningKind
+
+
+def _noop(_seconds: float) -> None:
+    """Stand-in sleep so no retry path in this module ever blocks on the wall clock."""
+
+
+# AttemptResult is frozen, so runners can hand back these shared instances on every attempt.
+_OK = AttemptResult(success=True, output={"ok": True})
+_FAIL_TIMEOUT = AttemptResult(success=False, error_kind=ErrorKind.RETRYABLE_TIMEOUT)
+_FAIL_RL = AttemptResult(success=False, error_kind=ErrorKind.RETRYABLE_RATE_LIMIT)
+_FAIL_AUTH = AttemptResult(success=False, error_kind=ErrorKind.NON_RETRYABLE_AUTH)
+
+# (name, attempt outcomes, expected success, attempts, final error, delays) under the 2-retry policy
+_RETRY_CASES = (
+    (
+        "retry_then_success",
+        (_FAIL_TIMEOUT, _OK),
+        True,
+        2,
+        None,
+        [1.0],
+    ),
+    (
+        "retry_exhaustion",
+        (_FAIL_RL,) * 3,
+        False,
+        3,
+        ErrorKind.RETRYABLE_RATE_LIMIT,
+        [1.0, 2.0],
+    ),
+)
+# (provider success map, expected terminal state)
+_TERMINAL_CASES = (
+    ({"claude": True, "codex": True}, TaskState.COMPLETED),
+    ({"claude": True, "codex": False}, TaskState.PARTIAL_SUCCESS),
+    ({"claude": False, "codex": False}, TaskState.FAILED),
+)
+# (elapsed, timeout, grace, heartbeat age, heartbeat ttl, expected should_expire)
+_EXPIRE_CASES = (
+    (650, 600, 30, 10, 60, True),
+    (120, 600, 30, 90, 60, True),
+    (120, 600, 30, 10, 60, False),
+)
 
 
 class RetrySemanticsTests(unittest.TestCase):
-    def test_retry_then_success(self) -> None:
+    @classmethod
+    def setUpClass(cls) -> None:
+        # RetryPolicy is frozen, so one instance is safely shared by every test.
+        cls.policy = RetryPolicy(max_retries=2, base_delay_seconds=1.0, backoff_multiplier=2.0)
+
+    def setUp(self) -> None:
+        self.slept: list[float] = []
+        self.runtime = OrchestratorRuntime(self.policy, sleep_fn=self.slept.append)
+
+    def _run_retry_scenario(self, outcomes: tuple[AttemptResult, ...]) -> RunResult:
+        self.slept.clear()
+        remaining = iter(outcomes)
+        return self.runtime.run_with_retry("task-retry", "claude", lambda _attempt: next(remaining))
+
+    def test_retry_scenarios(self) -> None:
+        for name, outcomes, success, attempts, final_error, delays in _RETRY_CASES:
+            with self.subTest(scenario=name):
+                result = self._run_retry_scenario(outcomes)
+                self.assertIs(result.success, success)
+                self.assertEqual(result.attempts, attempts)
+                self.assertEqual(result.final_error, final_error)
+                self.assertEqual(result.delays_seconds, delays)
+                self.assertEqual(self.slept, delays)
+
+    def test_attempt_results_are_immutable(self) -> None:
+        with self.assertRaises(FrozenInstanceError):
+            _OK.success = False  # type: ignore[misc]
+
+    def test_zero_max_retries_runs_single_attempt(self) -> None:
         slept: list[float] = []
-        runtime = OrchestratorRuntime(
-            RetryPolicy(max_retries=2, base_delay_seconds=1.0, backoff_multiplier=2.0),
-            sleep_fn=slept.append,
-        )
+        runtime = OrchestratorRuntime(RetryPolicy(max_retries=0), sleep_fn=slept.append)
 
-        def runner(attempt: int) -> AttemptResult:
-            if attempt == 1:
-                return AttemptResult(success=False, error_kind=ErrorKind.RETRYABLE_TIMEOUT)
-            return AttemptResult(success=True, output={"ok": True})
+        def runner(_attempt: int) -> AttemptResult:
+            return _FAIL_TIMEOUT
 
-        result = runtime.run_with_retry("task-1", "claude", runner)
+        result = runtime.run_with_retry("task-0", "gemini", runner)
+        self.assertFalse(result.success)
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(result.final_error, ErrorKind.RETRYABLE_TIMEOUT)
+        self.assertEqual(slept, [])
+
+    def test_unused_retry_delays_are_never_computed(self) -> None:
+        # compute_delay overflows this far out, so only delays for retries that happen may be evaluated.
+        runtime = OrchestratorRuntime(RetryPolicy(max_retries=1100), sleep_fn=_noop)
+        outcomes = iter((_FAIL_TIMEOUT, _OK))
+        result = runtime.run_with_retry("task-big", "claude", lambda _attempt: next(outcomes))
         self.assertTrue(result.success)
         self.assertEqual(result.attempts, 2)
         self.assertEqual(result.delays_seconds, [1.0])
-        self.assertEqual(slept, [1.0])
 
-    def test_retry_exhaustion(self) -> None:
-        slept: list[float] = []
-        runtime = OrchestratorRuntime(
-            RetryPolicy(max_retries=2, base_delay_seconds=1.0, backoff_multiplier=2.0),
-            sleep_fn=slept.append,
-        )
-
-        def runner(_attempt: int) -> AttemptResult:
-            return AttemptResult(success=False, error_kind=ErrorKind.RETRYABLE_RATE_LIMIT)
-
-        result = runtime.run_with_retry("task-2", "codex", runner)
-        self.assertFalse(result.success)
-        self.assertEqual(result.attempts, 3)
-        self.assertEqual(result.final_error, ErrorKind.RETRYABLE_RATE_LIMIT)
-        self.assertEqual(result.delays_seconds, [1.0, 2.0])
-        self.assertEqual(slept, [1.0, 2.0])
+    def test_negative_max_retries_still_runs_one_attempt(self) -> None:
+        runtime = OrchestratorRuntime(RetryPolicy(max_retries=-1), sleep_fn=_noop)
+        result = runtime.run_with_retry("task-neg", "claude", lambda _attempt: _FAIL_TIMEOUT)
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(result.delays_seconds, [])
 
     def test_non_retryable_no_retry(self) -> None:
-        runtime = OrchestratorRuntime()
+        runtime = OrchestratorRuntime(sleep_fn=_noop)
 
         def runner(_attempt: int) -> AttemptResult:
-            return AttemptResult(success=False, error_kind=ErrorKind.NON_RETRYABLE_AUTH)
+            return _FAIL_AUTH
 
         result = runtime.run_with_retry("task-3", "qwen", runner)
         self.assertFalse(result.success)
@@ -56,43 +120,38 @@ class RetrySemanticsTests(unittest.TestCase):
         self.assertEqual(result.delays_seconds, [])
 
     def test_dispatch_always_executes(self) -> None:
-        runtime = OrchestratorRuntime()
-        calls = {"n": 0}
+        runtime = OrchestratorRuntime(sleep_fn=_noop)
+        calls = 0
 
         def runner(_attempt: int) -> AttemptResult:
-            calls["n"] += 1
+            nonlocal calls
+            calls += 1
             return AttemptResult(success=True, output={"ok": True}, warnings=[WarningKind.PROVIDER_WARNING_MCP_STARTUP])
 
         first = runtime.run_with_retry("task-4", "opencode", runner)
         second = runtime.run_with_retry("task-4", "opencode", runner)
-        self.assertEqual(calls["n"], 2)
+        self.assertEqual(calls, 2)
         self.assertEqual(second.warnings, [WarningKind.PROVIDER_WARNING_MCP_STARTUP])
 
     def test_terminal_state_evaluation(self) -> None:
-        runtime = OrchestratorRuntime()
-        self.assertEqual(runtime.evaluate_terminal_state({"claude": True, "codex": True}), TaskState.COMPLETED)
-        self.assertEqual(runtime.evaluate_terminal_state({"claude": True, "codex": False}), TaskState.PARTIAL_SUCCESS)
-        self.assertEqual(runtime.evaluate_terminal_state({"claude": False, "codex": False}), TaskState.FAILED)
+        runtime = OrchestratorRuntime(sleep_fn=_noop)
+        for outcomes, expected in _TERMINAL_CASES:
+            with self.subTest(outcomes=outcomes):
+                self.assertEqual(runtime.evaluate_terminal_state(outcomes), expected)
 
     def test_expire_trigger(self) -> None:
-        self.assertTrue(
-            OrchestratorRuntime.should_expire(
-                elapsed_seconds=650,
-                timeout_seconds=600,
-                grace_seconds=30,
-                heartbeat_age_seconds=10,
-                heartbeat_ttl_seconds=60,
-            )
-        )
-        self.assertTrue(
-            OrchestratorRuntime.should_expire(
-                elapsed_seconds=120,
-                timeout_seconds=600,
-                grace_seconds=30,
-                heartbeat_age_seconds=90,
-                heartbeat_ttl_seconds=60,
-            )
-        )
+        for elapsed, timeout, grace, heartbeat_age, heartbeat_ttl, expected in _EXPIRE_CASES:
+            with self.subTest(elapsed_seconds=elapsed, heartbeat_age_seconds=heartbeat_age):
+                self.assertIs(
+                    OrchestratorRuntime.should_expire(
+                        elapsed_seconds=elapsed,
+                        timeout_seconds=timeout,
+                        grace_seconds=grace,
+                        heartbeat_age_seconds=heartbeat_age,
+                        heartbeat_ttl_seconds=heartbeat_ttl,
+                    ),
+                    expected,
+                )
 
 
 class StateMachineTests(unittest.TestCase):
@@ -110,32 +169,47 @@ class StateMachineTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             sm.transition(TaskState.RUNNING)
 
+    def test_transition_mask_matches_transition_table(self) -> None:
+        for state in TaskState:
+            for next_state in TaskState:
+                sm = TaskStateMachine(state=state)
+                with self.subTest(state=state, next_state=next_state):
+                    if next_state in VALID_TRANSITIONS[state]:
+                        sm.transition(next_state)
+                        self.assertEqual(sm.state, next_state)
+                    else:
+                        with self.assertRaises(ValueError):
+                            sm.transition(next_state)
+            with self.subTest(state=state, next_state="BOGUS"):
+                with self.assertRaises(ValueError):
+                    TaskStateMachine(state=state).transition("BOGUS")  # type: ignore[arg-type]
+
 
 class RestartRecoveryTests(unittest.TestCase):
     def test_runtime_instances_are_independent(self) -> None:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            _ = tmpdir
-            runtime_a = OrchestratorRuntime()
-            calls_a = {"n": 0}
+        runtime_a = OrchestratorRuntime(sleep_fn=_noop)
+        calls_a = 0
 
-            def runner_a(_attempt: int) -> AttemptResult:
-                calls_a["n"] += 1
-                return AttemptResult(success=True, output={"ok": True})
+        def runner_a(_attempt: int) -> AttemptResult:
+            nonlocal calls_a
+            calls_a += 1
+            return _OK
 
-            first = runtime_a.run_with_retry("task-r2", "codex", runner_a)
-            self.assertEqual(calls_a["n"], 1)
+        first = runtime_a.run_with_retry("task-r2", "codex", runner_a)
+        self.assertEqual(calls_a, 1)
 
-            runtime_b = OrchestratorRuntime()
-            calls_b = {"n": 0}
+        runtime_b = OrchestratorRuntime(sleep_fn=_noop)
+        calls_b = 0
 
-            def runner_b(_attempt: int) -> AttemptResult:
-                calls_b["n"] += 1
-                return AttemptResult(success=True, output={"ok": False})
+        def runner_b(_attempt: int) -> AttemptResult:
+            nonlocal calls_b
+            calls_b += 1
+            return AttemptResult(success=True, output={"ok": False})
 
-            second = runtime_b.run_with_retry("task-r2", "codex", runner_b)
-            self.assertEqual(calls_b["n"], 1)
-            self.assertTrue(second.success)
-            self.assertEqual(second.output, {"ok": False})
+        second = runtime_b.run_with_retry("task-r2", "codex", runner_b)
+        self.assertEqual(calls_b, 1)
+        self.assertTrue(second.success)
+        self.assertEqual(second.output, {"ok": False})
 
 
 if __name__ == "__main__":